@@ -0,0 +1,628 @@
+from __future__ import annotations
+from abc import ABC, abstractmethod
+import json
+import logging
+from pathlib import Path
+import socket
+import time
+from typing import Dict, Iterable, List, NamedTuple, Optional
+import uuid
+
+import duckdb
+from pymongo import ReturnDocument, UpdateOne
+
+from game_story import GameNotFoundError, GameStoryAPI, GameStoryData, WriteGameStoryLocal
+from mongo_connect import MongoConnect
+from teams import ITeams, TeamsAPI
+
+# game_story configures the root logger on import, so log to a file of our own
+logger = logging.getLogger(__name__)
+Path('./logs').mkdir(exist_ok=True)
+_handler = logging.FileHandler("./logs/backfill.log")
+_handler.setFormatter(logging.Formatter("{asctime} - {levelname} - {message}",
+                                        datefmt="%Y-%m-%d %H:%M",
+                                        style='{'))
+logger.addHandler(_handler)
+logger.setLevel(logging.INFO)
+logger.propagate = False
+
+GAME_STORY: str = 'game_story'
+TEAM_SEASON: str = 'team_season'
+
+# Upper bound of the game number portion of a game id (32 teams * 82 games / 2)
+MAX_REGULAR_SEASON_GAMES: int = 1312
+# Playoff game numbers are 0RSG, round, series in the round and game e.g. 0417
+PLAYOFF_SERIES_PER_ROUND: Dict[int, int] = {1: 8, 2: 4, 3: 2, 4: 1}
+PLAYOFF_GAMES_PER_SERIES: int = 7
+
+
+class WorkUnit(NamedTuple):
+    unit_id: str
+    kind: str
+    payload: Dict
+
+
+def plan_game_story_units(start_season: int,
+                          end_season: int,
+                          game_types: Iterable[int] = (2, 3),
+                          chunk_size: int = 100) -> List[WorkUnit]:
+    """
+    Split the game id space into work units
+
+    Game ids are formatted as YYYYTTNNNN, the season start year, the game
+    type and the game number. Regular season numbers are split into chunks,
+    playoffs get a unit per round.
+
+    Args:
+        start_season (int): First season start year e.g. 2000
+        end_season (int): Last season start year, inclusive
+        game_types (Iterable[int], optional): Game types. Defaults to (2, 3).
+        chunk_size (int, optional): Regular season games per unit. Defaults to 100.
+
+    Returns:
+        List[WorkUnit]: Work units covering the game id space
+    """
+    if chunk_size < 1:
+        raise ValueError("chunk_size must be at least 1")
+    units: List[WorkUnit] = []
+    for season in range(start_season, end_season + 1):
+        for game_type in game_types:
+            if game_type == 3:
+                for playoff_round in PLAYOFF_SERIES_PER_ROUND:
+                    unit_id = f"{GAME_STORY}:{season}:03:round-{playoff_round}"
+                    payload = {'season': season, 'game_type': game_type, 'round': playoff_round}
+                    units.append(WorkUnit(unit_id, GAME_STORY, payload))
+                continue
+            for first in range(1, MAX_REGULAR_SEASON_GAMES + 1, chunk_size):
+                end = min(first + chunk_size - 1, MAX_REGULAR_SEASON_GAMES)
+                unit_id = f"{GAME_STORY}:{season}:{game_type:02d}:{first:04d}-{end:04d}"
+                payload = {'season': season, 'game_type': game_type, 'first': first, 'last': end}
+                units.append(WorkUnit(unit_id, GAME_STORY, payload))
+    return units
+
+
+def team_seasons(teams: ITeams, tri_codes: Iterable[str]) -> Dict[str, List[int]]:
+    """
+    Pull the seasons each team played, teams without a season list are skipped
+
+    Args:
+        teams (ITeams): Teams data interface
+        tri_codes (Iterable[str]): Team codes
+
+    Returns:
+        Dict[str, List[int]]: Seasons by team code
+    """
+    seasons: Dict[str, List[int]] = {}
+    for code in sorted(set(tri_codes)):
+        try:
+            seasons[code] = teams.pull_team_season(code)
+        except (RuntimeError, ValueError) as e:
+            logger.info(f"Skipping team {code}, no seasons: {e}")
+    return seasons
+
+
+def plan_team_season_units(seasons: Dict[str, Iterable[int]]) -> List[WorkUnit]:
+    """
+    Split the team season space into a unit per team and season
+
+    Each unit pulls the team's regular season club stats for the season.
+
+    Args:
+        seasons (Dict[str, Iterable[int]]): Seasons by team code, see team_seasons
+
+    Returns:
+        List[WorkUnit]: Work units for each team and season
+    """
+    return [WorkUnit(f"{TEAM_SEASON}:{code}:{season}", TEAM_SEASON, {'triCode': code, 'season': season})
+            for code in sorted(seasons)
+            for season in sorted(set(seasons[code]))]
+
+
+def game_ids(payload: Dict) -> List[int]:
+    """
+    Expand a game story payload into its game ids
+
+    Args:
+        payload (Dict): Game story work unit payload
+
+    Returns:
+        List[int]: Game ids in the unit
+    """
+    prefix = payload['season'] * 1_000_000 + payload['game_type'] * 10_000
+    if 'round' in payload:
+        playoff_round = payload['round']
+        return [prefix + playoff_round * 100 + series * 10 + game
+                for series in range(1, PLAYOFF_SERIES_PER_ROUND[playoff_round] + 1)
+                for game in range(1, PLAYOFF_GAMES_PER_SERIES + 1)]
+    return [prefix + number for number in range(payload['first'], payload['last'] + 1)]
+
+
+class ILeaseStore(ABC):
+
+    @abstractmethod
+    def add_units(self):
+        raise NotImplementedError()
+
+    @abstractmethod
+    def claim(self):
+        raise NotImplementedError()
+
+    @abstractmethod
+    def heartbeat(self):
+        raise NotImplementedError()
+
+    @abstractmethod
+    def complete(self):
+        raise NotImplementedError()
+
+    @abstractmethod
+    def release(self):
+        raise NotImplementedError()
+
+    @abstractmethod
+    def counts(self):
+        raise NotImplementedError()
+
+
+class DuckDBLeaseStore(ILeaseStore):
+
+    def __init__(self,
+                 path: Path = Path('./data/backfill.duckdb'),
+                 retries: int = 50,
+                 retry_wait: float = 0.1) -> None:
+        """
+        Constructor
+
+        DuckDB lets a single process hold the file at a time, so each
+        operation opens a short lived connection and retries while another
+        worker holds the lock. Every operation is an exclusive write, so this
+        store suits one machine running a few workers. Larger runs, or workers
+        on several machines, need MongoLeaseStore.
+
+        Args:
+            path (Path, optional): DuckDB file. Defaults to Path('./data/backfill.duckdb').
+            retries (int, optional): Attempts to open a locked file. Defaults to 50.
+            retry_wait (float, optional): Seconds between attempts. Defaults to 0.1.
+        """
+        self.path = Path(path)
+        self.retries = retries
+        self.retry_wait = retry_wait
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._execute("""
+            CREATE TABLE IF NOT EXISTS leases (
+                unit_id VARCHAR PRIMARY KEY,
+                kind VARCHAR NOT NULL,
+                payload VARCHAR NOT NULL,
+                status VARCHAR NOT NULL DEFAULT 'pending',
+                owner VARCHAR,
+                lease_expires DOUBLE,
+                attempts INTEGER NOT NULL DEFAULT 0
+            )""")
+
+    def _execute(self, query: str, params: Optional[List] = None, many: bool = False) -> List[tuple]:
+        """
+        Run a query on its own connection, retrying if the file is locked
+
+        Args:
+            query (str): SQL to run
+            params (Optional[List], optional): Query parameters. Defaults to None.
+            many (bool, optional): Run params as a batch. Defaults to False.
+
+        Raises:
+            RuntimeError: Unable to open the lease store
+
+        Returns:
+            List[tuple]: Rows returned by the query
+        """
+        for attempt in range(self.retries):
+            try:
+                with duckdb.connect(str(self.path)) as con:
+                    if many:
+                        con.executemany(query, params)
+                        return []
+                    return con.execute(query, params or []).fetchall()
+            except duckdb.IOException as e:
+                logger.info(f"Lease store locked, attempt {attempt + 1}: {e}")
+                time.sleep(self.retry_wait)
+        logger.error(f"Unable to open lease store {self.path}")
+        raise RuntimeError(f"Unable to open lease store {self.path}")
+
+    def add_units(self, units: Iterable[WorkUnit]) -> None:
+        """
+        Add work units, units already in the store are left untouched
+
+        Args:
+            units (Iterable[WorkUnit]): Units to add
+        """
+        rows = [[unit.unit_id, unit.kind, json.dumps(unit.payload)] for unit in units]
+        if rows:
+            self._execute("INSERT OR IGNORE INTO leases (unit_id, kind, payload) VALUES (?, ?, ?)",
+                          rows, many=True)
+
+    def claim(self, owner: str, lease_seconds: float, max_attempts: int = 3) -> Optional[WorkUnit]:
+        """
+        Lease the next pending or expired unit
+
+        Units that used every attempt are marked failed instead of claimed.
+
+        Args:
+            owner (str): Worker id
+            lease_seconds (float): Seconds until the lease expires
+            max_attempts (int, optional): Attempts before a unit fails. Defaults to 3.
+
+        Returns:
+            Optional[WorkUnit]: The claimed unit, None if no work remains
+        """
+        now = time.time()
+        self._execute("""
+            UPDATE leases SET status = 'failed', owner = NULL, lease_expires = NULL
+            WHERE attempts >= ?
+              AND (status = 'pending' OR (status = 'leased' AND lease_expires < ?))""",
+            [max_attempts, now])
+        rows = self._execute("""
+            UPDATE leases
+            SET status = 'leased', owner = ?, lease_expires = ?, attempts = attempts + 1
+            WHERE unit_id = (
+                SELECT unit_id FROM leases
+                WHERE attempts < ?
+                  AND (status = 'pending' OR (status = 'leased' AND lease_expires < ?))
+                ORDER BY unit_id
+                LIMIT 1)
+            RETURNING unit_id, kind, payload""",
+            [owner, now + lease_seconds, max_attempts, now])
+        if not rows:
+            return None
+        unit_id, kind, payload = rows[0]
+        return WorkUnit(unit_id, kind, json.loads(payload))
+
+    def heartbeat(self, unit_id: str, owner: str, lease_seconds: float) -> bool:
+        """
+        Extend a lease held by the owner
+
+        Args:
+            unit_id (str): Unit to extend
+            owner (str): Worker id
+            lease_seconds (float): Seconds from now until the lease expires
+
+        Returns:
+            bool: False if the lease was lost to another worker
+        """
+        rows = self._execute("""
+            UPDATE leases SET lease_expires = ?
+            WHERE unit_id = ? AND owner = ? AND status = 'leased'
+            RETURNING unit_id""",
+            [time.time() + lease_seconds, unit_id, owner])
+        return bool(rows)
+
+    def complete(self, unit_id: str, owner: str) -> bool:
+        """
+        Mark a unit as done
+
+        Args:
+            unit_id (str): Unit to complete
+            owner (str): Worker id
+
+        Returns:
+            bool: False if the lease was lost to another worker
+        """
+        rows = self._execute("""
+            UPDATE leases SET status = 'done', lease_expires = NULL
+            WHERE unit_id = ? AND owner = ? AND status = 'leased'
+            RETURNING unit_id""",
+            [unit_id, owner])
+        return bool(rows)
+
+    def release(self, unit_id: str, owner: str, max_attempts: int = 3) -> None:
+        """
+        Return a unit to the pending pool, or mark it failed if it used every attempt
+
+        Args:
+            unit_id (str): Unit to release
+            owner (str): Worker id
+            max_attempts (int, optional): Attempts before a unit fails. Defaults to 3.
+        """
+        self._execute("""
+            UPDATE leases
+            SET status = CASE WHEN attempts >= ? THEN 'failed' ELSE 'pending' END,
+                owner = NULL, lease_expires = NULL
+            WHERE unit_id = ? AND owner = ? AND status = 'leased'""",
+            [max_attempts, unit_id, owner])
+
+    def counts(self) -> Dict[str, int]:
+        """
+        Count units by status
+
+        Returns:
+            Dict[str, int]: Number of units in each status
+        """
+        return dict(self._execute("SELECT status, count(*) FROM leases GROUP BY status"))
+
+
+class MongoLeaseStore(ILeaseStore):
+
+    def __init__(self,
+                 client: MongoConnect,
+                 db: str = 'nhl',
+                 collection: str = 'backfill_leases') -> None:
+        """
+        Constructor
+
+        Args:
+            client (MongoConnect): Mongo connection
+            db (str, optional): Database name. Defaults to 'nhl'.
+            collection (str, optional): Lease collection. Defaults to 'backfill_leases'.
+        """
+        self.collection = client.database(db)[collection]
+        self.collection.create_index([('status', 1), ('lease_expires', 1)])
+
+    def add_units(self, units: Iterable[WorkUnit]) -> None:
+        """
+        Add work units, units already in the store are left untouched
+
+        Args:
+            units (Iterable[WorkUnit]): Units to add
+        """
+        operations = [UpdateOne({'_id': unit.unit_id},
+                                {'$setOnInsert': {'kind': unit.kind,
+                                                  'payload': unit.payload,
+                                                  'status': 'pending',
+                                                  'owner': None,
+                                                  'lease_expires': None,
+                                                  'attempts': 0}},
+                                upsert=True)
+                      for unit in units]
+        if operations:
+            self.collection.bulk_write(operations, ordered=False)
+
+    def claim(self, owner: str, lease_seconds: float, max_attempts: int = 3) -> Optional[WorkUnit]:
+        """
+        Lease the next pending or expired unit
+
+        Units that used every attempt are marked failed instead of claimed.
+
+        Args:
+            owner (str): Worker id
+            lease_seconds (float): Seconds until the lease expires
+            max_attempts (int, optional): Attempts before a unit fails. Defaults to 3.
+
+        Returns:
+            Optional[WorkUnit]: The claimed unit, None if no work remains
+        """
+        now = time.time()
+        self.collection.update_many(
+            {'attempts': {'$gte': max_attempts},
+             '$or': [{'status': 'pending'},
+                     {'status': 'leased', 'lease_expires': {'$lt': now}}]},
+            {'$set': {'status': 'failed', 'owner': None, 'lease_expires': None}})
+        document = self.collection.find_one_and_update(
+            {'attempts': {'$lt': max_attempts},
+             '$or': [{'status': 'pending'},
+                     {'status': 'leased', 'lease_expires': {'$lt': now}}]},
+            {'$set': {'status': 'leased', 'owner': owner, 'lease_expires': now + lease_seconds},
+             '$inc': {'attempts': 1}},
+            sort=[('_id', 1)],
+            return_document=ReturnDocument.AFTER)
+        if document is None:
+            return None
+        return WorkUnit(document['_id'], document['kind'], document['payload'])
+
+    def heartbeat(self, unit_id: str, owner: str, lease_seconds: float) -> bool:
+        """
+        Extend a lease held by the owner
+
+        Args:
+            unit_id (str): Unit to extend
+            owner (str): Worker id
+            lease_seconds (float): Seconds from now until the lease expires
+
+        Returns:
+            bool: False if the lease was lost to another worker
+        """
+        result = self.collection.update_one(
+            {'_id': unit_id, 'owner': owner, 'status': 'leased'},
+            {'$set': {'lease_expires': time.time() + lease_seconds}})
+        return result.matched_count == 1
+
+    def complete(self, unit_id: str, owner: str) -> bool:
+        """
+        Mark a unit as done
+
+        Args:
+            unit_id (str): Unit to complete
+            owner (str): Worker id
+
+        Returns:
+            bool: False if the lease was lost to another worker
+        """
+        result = self.collection.update_one(
+            {'_id': unit_id, 'owner': owner, 'status': 'leased'},
+            {'$set': {'status': 'done', 'lease_expires': None}})
+        return result.matched_count == 1
+
+    def release(self, unit_id: str, owner: str, max_attempts: int = 3) -> None:
+        """
+        Return a unit to the pending pool, or mark it failed if it used every attempt
+
+        Args:
+            unit_id (str): Unit to release
+            owner (str): Worker id
+            max_attempts (int, optional): Attempts before a unit fails. Defaults to 3.
+        """
+        self.collection.update_one(
+            {'_id': unit_id, 'owner': owner, 'status': 'leased'},
+            [{'$set': {'status': {'$cond': [{'$gte': ['$attempts', max_attempts]}, 'failed', 'pending']},
+                       'owner': None,
+                       'lease_expires': None}}])
+
+    def counts(self) -> Dict[str, int]:
+        """
+        Count units by status
+
+        Returns:
+            Dict[str, int]: Number of units in each status
+        """
+        pipeline = [{'$group': {'_id': '$status', 'count': {'$sum': 1}}}]
+        return {row['_id']: row['count'] for row in self.collection.aggregate(pipeline)}
+
+
+class BackfillWorker:
+
+    def __init__(self,
+                 store: ILeaseStore,
+                 game_writer: WriteGameStoryLocal,
+                 teams: ITeams,
+                 worker_id: Optional[str] = None,
+                 lease_seconds: float = 300,
+                 max_attempts: int = 3,
+                 path: str = './raw/',
+                 store_retry_wait: float = 5) -> None:
+        """
+        Constructor
+
+        Args:
+            store (ILeaseStore): Shared lease store
+            game_writer (WriteGameStoryLocal): Writer for game story data
+            teams (ITeams): Teams data interface
+            worker_id (Optional[str], optional): Worker id. Defaults to host name and a random suffix.
+            lease_seconds (float, optional): Lease length in seconds. Defaults to 300.
+            max_attempts (int, optional): Attempts before a unit fails. Defaults to 3.
+            path (str, optional): Path to store raw data. Defaults to './raw/'.
+            store_retry_wait (float, optional): Seconds to wait after a lease store error. Defaults to 5.
+        """
+        self.store = store
+        self.game_writer = game_writer
+        self.teams = teams
+        self.worker_id = worker_id or f"{socket.gethostname()}-{uuid.uuid4().hex[:8]}"
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max_attempts
+        self.path = path
+        self.store_retry_wait = store_retry_wait
+        self._last_heartbeat: float = time.monotonic()
+
+    def heartbeat(self, unit: WorkUnit) -> None:
+        """
+        Extend the lease on the unit once half of the lease has passed
+
+        Each heartbeat is a write to the shared store, so it is skipped while
+        the lease is still fresh.
+
+        Args:
+            unit (WorkUnit): Unit being processed
+
+        Raises:
+            RuntimeError: The lease expired and was claimed by another worker
+        """
+        if time.monotonic() - self._last_heartbeat < self.lease_seconds / 2:
+            return
+        if not self.store.heartbeat(unit.unit_id, self.worker_id, self.lease_seconds):
+            raise RuntimeError(f"Lost lease on unit {unit.unit_id}")
+        self._last_heartbeat = time.monotonic()
+
+    def process_game_story(self, unit: WorkUnit) -> None:
+        """
+        Write the raw data for each game in the unit
+
+        Games the api reports as not found are logged and skipped, the game id
+        space is sparse for short seasons. Any other error fails the unit so
+        it is retried.
+
+        Args:
+            unit (WorkUnit): Game story unit
+        """
+        for game_id in game_ids(unit.payload):
+            try:
+                self.game_writer.raw_data(game_id=game_id, path=self.path)
+            except GameNotFoundError as e:
+                logger.info(f"Skipping game {game_id}: {e}")
+            self.heartbeat(unit)
+
+    def process_team_season(self, unit: WorkUnit) -> None:
+        """
+        Write the team's club stats for the season
+
+        Args:
+            unit (WorkUnit): Team season unit
+        """
+        code = unit.payload['triCode']
+        season = unit.payload['season']
+        data = self.teams.pull_club_stats_raw(code, season)
+        file = Path(self.path + 'club_stats_' + code + '_' + str(season) + '.json')
+        file.parent.mkdir(parents=True, exist_ok=True)
+        file.write_bytes(data)
+
+    def process(self, unit: WorkUnit) -> None:
+        """
+        Process a work unit
+
+        Args:
+            unit (WorkUnit): Unit to process
+
+        Raises:
+            ValueError: Unknown unit kind
+        """
+        if unit.kind == GAME_STORY:
+            self.process_game_story(unit)
+        elif unit.kind == TEAM_SEASON:
+            self.process_team_season(unit)
+        else:
+            raise ValueError(f"Unknown work unit kind {unit.kind}")
+
+    def run(self, max_units: Optional[int] = None) -> int:
+        """
+        Claim and process units until no work remains
+
+        Failed units are released for another worker to retry, units that
+        used max_attempts are marked failed. Lease store errors are logged and
+        retried after store_retry_wait, a unit that could not be released or
+        completed is reclaimed once its lease expires.
+
+        Args:
+            max_units (Optional[int], optional): Stop after this many units. Defaults to None.
+
+        Returns:
+            int: Number of units completed
+        """
+        completed = 0
+        while max_units is None or completed < max_units:
+            try:
+                unit = self.store.claim(self.worker_id, self.lease_seconds, self.max_attempts)
+            except RuntimeError as e:
+                logger.error(f"Worker {self.worker_id} unable to claim a unit error {e}")
+                time.sleep(self.store_retry_wait)
+                continue
+            if unit is None:
+                break
+            logger.info(f"Worker {self.worker_id} claimed {unit.unit_id}")
+            self._last_heartbeat = time.monotonic()
+            try:
+                self.process(unit)
+            except Exception as e:
+                logger.error(f"Worker {self.worker_id} failed unit {unit.unit_id} error {e}")
+                try:
+                    self.store.release(unit.unit_id, self.worker_id, self.max_attempts)
+                except RuntimeError as e:
+                    logger.error(f"Worker {self.worker_id} unable to release {unit.unit_id} error {e}")
+                    time.sleep(self.store_retry_wait)
+                continue
+            try:
+                done = self.store.complete(unit.unit_id, self.worker_id)
+            except RuntimeError as e:
+                logger.error(f"Worker {self.worker_id} unable to complete {unit.unit_id} error {e}")
+                time.sleep(self.store_retry_wait)
+                continue
+            if done:
+                completed += 1
+                logger.info(f"Worker {self.worker_id} completed {unit.unit_id}")
+        return completed
+
+
+if __name__ == '__main__':
+    # Seed the store once, then run this script on as many workers as needed
+    store = DuckDBLeaseStore()
+    teams_api = TeamsAPI()
+    tri_codes = [team.triCode for team in teams_api.pull_teams().data]
+    store.add_units(plan_team_season_units(team_seasons(teams_api, tri_codes)))
+    store.add_units(plan_game_story_units(2010, 2024))
+    writer = WriteGameStoryLocal(GameStoryData(GameStoryAPI()))
+    BackfillWorker(store, writer, teams_api).run()
+    print(store.counts())
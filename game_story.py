@@ -1,12 +1,12 @@
 from abc import ABC, abstractmethod
-import json
 import logging
 from pathlib import Path
-from typing import Any
+from typing import NamedTuple, Optional
 
 import requests
 
 import globals
+from models import GameStory
 
 logging.basicConfig(
     level=logging.INFO,
@@ -18,8 +18,24 @@ logging.basicConfig(
 )
 
 
+class GameNotFoundError(RuntimeError):
+    """
+    The api has no game for the game id
+    """
+
+
+class ConditionalResponse(NamedTuple):
+    data: Optional[GameStory]
+    etag: Optional[str]
+    last_modified: Optional[str]
+
+
 class IGameStoryAPI(ABC):
 
+    @abstractmethod
+    def pull_raw(self):
+        raise NotImplementedError()
+
     @abstractmethod
     def pull_data(self):
         raise NotImplementedError()
@@ -34,21 +50,92 @@ class GameStoryAPI(IGameStoryAPI):
         self.end_point: str = end_point
 
     @staticmethod
-    def validate(response, key) -> None:
-        if key not in response:
-            raise ValueError("Missing key {key} in response")
+    def decode(content: bytes, url: str) -> GameStory:
+        """
+        Decode the game story straight from the response bytes
+
+        Args:
+            content (bytes): Response body
+            url (str): Url the body was pulled from
 
-    def pull_data(self, game: int) -> Any:
+        Raises:
+            ValueError: Response does not match the game story model
+
+        Returns:
+            GameStory: The game story
+        """
+        try:
+            return GameStory.model_validate_json(content)
+        except ValueError as e:
+            logging.error(f"Invalid game story for {url} error {e}")
+            raise
+
+    def pull_raw(self, game: int, timeout: float = 10) -> bytes:
+        """
+        Pull the response body for the game as returned by the api
+
+        Args:
+            game (int): Game id
+            timeout (float, optional): Seconds to wait for the api. Defaults to 10.
+
+        Raises:
+            GameNotFoundError: The api has no game for the game id
+            RuntimeError: Error pulling data
+
+        Returns:
+            bytes: Response body
+        """
         url = self.base_url + self.end_point + str(game)
         try:
             logging.info(f"Pulling data from {url}")
-            r = requests.get(url)
+            r = requests.get(url, timeout=timeout)
             r.raise_for_status()
-            data = r.json()
-            return data
         except requests.exceptions.RequestException as e:
+            if e.response is not None and e.response.status_code == 404:
+                raise GameNotFoundError(f"No game story for {url}")
             logging.error(f"Error pulling data for {url}")
             raise RuntimeError(f"Error pulling data for {url} error {e}")
+        return r.content
+
+    def pull_data(self, game: int) -> GameStory:
+        url = self.base_url + self.end_point + str(game)
+        return self.decode(self.pull_raw(game), url)
+
+    def pull_conditional(self,
+                         game: int,
+                         etag: Optional[str] = None,
+                         last_modified: Optional[str] = None,
+                         timeout: float = 3) -> ConditionalResponse:
+        """
+        Pull data for the game only if it changed since the last pull
+
+        Args:
+            game (int): Game id
+            etag (Optional[str], optional): ETag of the last pull. Defaults to None.
+            last_modified (Optional[str], optional): Last-Modified of the last pull. Defaults to None.
+            timeout (float, optional): Seconds to wait for the api. Defaults to 3.
+
+        Raises:
+            RuntimeError: Error pulling data
+
+        Returns:
+            ConditionalResponse: Data is None if the game is unchanged
+        """
+        url = self.base_url + self.end_point + str(game)
+        headers = {}
+        if etag is not None:
+            headers['If-None-Match'] = etag
+        if last_modified is not None:
+            headers['If-Modified-Since'] = last_modified
+        try:
+            r = requests.get(url, headers=headers, timeout=timeout)
+            if r.status_code == 304:
+                return ConditionalResponse(None, etag, last_modified)
+            r.raise_for_status()
+        except requests.exceptions.RequestException as e:
+            logging.error(f"Error pulling data for {url}")
+            raise RuntimeError(f"Error pulling data for {url} error {e}")
+        return ConditionalResponse(self.decode(r.content, url), r.headers.get('ETag'), r.headers.get('Last-Modified'))
 
 
 class GameStoryData:
@@ -62,7 +149,7 @@ class GameStoryData:
         """
         self.game_story_api = game_story_api
 
-    def pull_data(self, game_id: int) -> Any:
+    def pull_data(self, game_id: int) -> GameStory:
         """
         Pull data for the game
 
@@ -70,9 +157,21 @@ class GameStoryData:
             game_id (int): Game to pull data for
 
         Returns:
-            Any: Json of the game data
+            GameStory: The game data
+        """
+        return self.game_story_api.pull_data(game_id)
+
+    def pull_raw(self, game_id: int) -> bytes:
+        """
+        Pull the game data as returned by the api
+
+        Args:
+            game_id (int): Game to pull data for
+
+        Returns:
+            bytes: Response body
         """
-        return self.game_story_api.pull_data(game)
+        return self.game_story_api.pull_raw(game_id)
 
 
 class IWriteGameStory(ABC):
@@ -106,16 +205,18 @@ class WriteGameStoryLocal(IWriteGameStory):
             file_name (Path, optional): File Name. Defaults to 'game_story'.
 
         Raises:
+            GameNotFoundError: The api has no game for the game id
             RuntimeError: Error running the script
         """
         try:
             logging.info(f"Writing file for game {game_id}")
-            data = self.game_data.pull_data(game_id=game_id)
-            data = json.dumps(data)
+            data = self.game_data.pull_raw(game_id=game_id)
             file = Path(path + file_name + '_' + str(game_id) + '.json')
             file.parent.mkdir(parents=True, exist_ok=True)
-            file.write_text(data, encoding='utf-8')
+            file.write_bytes(data)
             logging.info(f"Wrote file for game {game_id}")
+        except GameNotFoundError:
+            raise
         except Exception as e:
             logging.error(f"Error writing file for game {game_id} error {e}")
             raise RuntimeError(f"Error writing file {e}")
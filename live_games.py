@@ -0,0 +1,319 @@
+from __future__ import annotations
+import heapq
+import logging
+from pathlib import Path
+import time
+from typing import Any, Callable, Dict, List, NamedTuple, Optional, Set, Tuple
+
+import requests
+
+import globals
+from game_story import GameStoryAPI
+from models import GameStory, Goal, Penalty, Schedule, ScheduledGame, abbrev
+
+# game_story configures the root logger on import, so log to a file of our own
+logger = logging.getLogger(__name__)
+Path('./logs').mkdir(exist_ok=True)
+_handler = logging.FileHandler("./logs/live_games.log")
+_handler.setFormatter(logging.Formatter("{asctime} - {levelname} - {message}",
+                                        datefmt="%Y-%m-%d %H:%M",
+                                        style='{'))
+logger.addHandler(_handler)
+logger.setLevel(logging.INFO)
+logger.propagate = False
+
+LIVE_STATES: Tuple[str, ...] = ('LIVE', 'CRIT')
+FINAL_STATES: Tuple[str, ...] = ('FINAL', 'OFF')
+
+
+class GameEvent(NamedTuple):
+    game_id: int
+    kind: str
+    data: Any
+
+
+class LiveGamesAPI:
+
+    def __init__(self, base_url: str = globals.BASEURL) -> None:
+        """
+        Constructor
+
+        Args:
+            base_url (str, optional): Baseurl for requests. Defaults to globals.BASEURL
+        """
+        self.base_url = base_url
+
+    def pull_games(self, end_point: str = 'v1/score/now') -> List[ScheduledGame]:
+        """
+        Pull today's games from the scoreboard
+
+        Args:
+            end_point (str, optional): api end point. Defaults to 'v1/score/now'.
+
+        Raises:
+            RuntimeError: Error pulling the scoreboard
+            ValueError: Response does not match the schedule model
+
+        Returns:
+            List[ScheduledGame]: Today's games
+        """
+        url = self.base_url + end_point
+        try:
+            logger.info(f"Fetching live games from url: {url}")
+            r = requests.get(url)
+            r.raise_for_status()
+        except requests.exceptions.RequestException as e:
+            logger.error(f"Error fetching live games: {e}")
+            raise RuntimeError(f"Error fetching live games: {e}")
+        try:
+            return Schedule.model_validate_json(r.content).games
+        except ValueError as e:
+            logger.error(f"Invalid live games data: {e}")
+            raise
+
+    def pull_live_games(self, end_point: str = 'v1/score/now') -> List[int]:
+        """
+        Pull the ids of today's games that are in progress
+
+        Args:
+            end_point (str, optional): api end point. Defaults to 'v1/score/now'.
+
+        Returns:
+            List[int]: Ids of the games in progress
+        """
+        return [game.id for game in self.pull_games(end_point) if game.gameState in LIVE_STATES]
+
+
+def goal_events(snapshot: Optional[GameStory]) -> Dict[Tuple, Goal]:
+    """
+    Key the goals in a game story by period, time and scorer
+
+    Args:
+        snapshot (Optional[GameStory]): Game story
+
+    Returns:
+        Dict[Tuple, Goal]: Goals by key
+    """
+    if snapshot is None:
+        return {}
+    return {(group.periodDescriptor.number, goal.timeInPeriod, goal.playerId): goal
+            for group in snapshot.summary.scoring
+            for goal in group.goals}
+
+
+def penalty_events(snapshot: Optional[GameStory]) -> Dict[Tuple, Penalty]:
+    """
+    Key the penalties in a game story by period, time, team and penalty
+
+    Args:
+        snapshot (Optional[GameStory]): Game story
+
+    Returns:
+        Dict[Tuple, Penalty]: Penalties by key
+    """
+    if snapshot is None:
+        return {}
+    return {(group.periodDescriptor.number, penalty.timeInPeriod, abbrev(penalty.teamAbbrev), penalty.descKey): penalty
+            for group in snapshot.summary.penalties
+            for penalty in group.penalties}
+
+
+def score(snapshot: Optional[GameStory]) -> Tuple[Optional[int], Optional[int]]:
+    """
+    Away and home score of the game
+
+    Args:
+        snapshot (Optional[GameStory]): Game story
+
+    Returns:
+        Tuple[Optional[int], Optional[int]]: Away and home score
+    """
+    if snapshot is None:
+        return (None, None)
+    return (snapshot.awayTeam.score, snapshot.homeTeam.score)
+
+
+def diff_snapshots(game_id: int, previous: Optional[GameStory], current: GameStory) -> List[GameEvent]:
+    """
+    Events in the current snapshot that were not in the previous snapshot
+
+    Every event is new when there is no previous snapshot.
+
+    Args:
+        game_id (int): Game id
+        previous (Optional[GameStory]): Last game story
+        current (GameStory): New game story
+
+    Returns:
+        List[GameEvent]: New goals, penalties, score and game state changes
+    """
+    events: List[GameEvent] = []
+    previous_goals = goal_events(previous)
+    for key, goal in goal_events(current).items():
+        if key not in previous_goals:
+            events.append(GameEvent(game_id, 'goal', goal))
+    previous_penalties = penalty_events(previous)
+    for key, penalty in penalty_events(current).items():
+        if key not in previous_penalties:
+            events.append(GameEvent(game_id, 'penalty', penalty))
+    if score(current) != score(previous):
+        away, home = score(current)
+        events.append(GameEvent(game_id, 'score', {'away': away, 'home': home}))
+    previous_state = previous.gameState if previous is not None else None
+    if current.gameState != previous_state:
+        events.append(GameEvent(game_id, 'state', current.gameState))
+    return events
+
+
+class LiveGamePoller:
+
+    def __init__(self,
+                 game_story_api: GameStoryAPI,
+                 live_games_api: LiveGamesAPI,
+                 live_interval: float = 5,
+                 intermission_interval: float = 60,
+                 error_interval: float = 15) -> None:
+        """
+        Constructor
+
+        Args:
+            game_story_api (GameStoryAPI): Game story api
+            live_games_api (LiveGamesAPI): Api for the games in progress
+            live_interval (float, optional): Seconds between polls during play. Defaults to 5.
+            intermission_interval (float, optional): Seconds between polls in intermission. Defaults to 60.
+            error_interval (float, optional): Seconds before retrying a failed poll. Defaults to 15.
+        """
+        self.game_story_api = game_story_api
+        self.live_games_api = live_games_api
+        self.live_interval = live_interval
+        self.intermission_interval = intermission_interval
+        self.error_interval = error_interval
+        self.subscribers: List[Callable[[GameEvent], None]] = []
+        self.snapshots: Dict[int, GameStory] = {}
+        self._validators: Dict[int, Tuple[Optional[str], Optional[str]]] = {}
+
+    def subscribe(self, callback: Callable[[GameEvent], None]) -> None:
+        """
+        Register a callback for new game events
+
+        Args:
+            callback (Callable[[GameEvent], None]): Called with each new event
+        """
+        self.subscribers.append(callback)
+
+    def publish(self, events: List[GameEvent]) -> None:
+        """
+        Send events to every subscriber
+
+        Args:
+            events (List[GameEvent]): Events to send
+        """
+        for event in events:
+            for callback in self.subscribers:
+                try:
+                    callback(event)
+                except Exception as e:
+                    logger.error(f"Subscriber failed on {event.kind} for game {event.game_id} error {e}")
+
+    def interval(self, snapshot: Optional[GameStory]) -> Optional[float]:
+        """
+        Seconds until the next poll of the game
+
+        Args:
+            snapshot (Optional[GameStory]): Last game story
+
+        Returns:
+            Optional[float]: None once the game is final
+        """
+        if snapshot is None:
+            return self.intermission_interval
+        if snapshot.gameState in FINAL_STATES:
+            return None
+        if snapshot.clock.inIntermission:
+            return self.intermission_interval
+        if snapshot.gameState in LIVE_STATES:
+            return self.live_interval
+        return self.intermission_interval
+
+    def poll(self, game_id: int) -> Optional[float]:
+        """
+        Poll the game and publish new events
+
+        The game story is only downloaded and diffed if it changed since
+        the last poll.
+
+        Args:
+            game_id (int): Game id
+
+        Returns:
+            Optional[float]: Seconds until the next poll, None once the game is final
+        """
+        etag, last_modified = self._validators.get(game_id, (None, None))
+        response = self.game_story_api.pull_conditional(game_id, etag, last_modified)
+        self._validators[game_id] = (response.etag, response.last_modified)
+        if response.data is not None:
+            events = diff_snapshots(game_id, self.snapshots.get(game_id), response.data)
+            self.snapshots[game_id] = response.data
+            self.publish(events)
+        return self.interval(self.snapshots.get(game_id))
+
+    def run(self, refresh_interval: float = 300) -> None:
+        """
+        Poll today's live games until every game on the scoreboard is final
+
+        A failed scoreboard refresh is logged and retried on the next refresh.
+        Games the scoreboard reports as final stop being polled even if their
+        game story keeps failing.
+
+        Args:
+            refresh_interval (float, optional): Seconds between checks for games that started. Defaults to 300.
+        """
+        queue: List[Tuple[float, int]] = []
+        polling = set()
+        unfinished = True
+        final: Set[int] = set()
+        next_refresh = time.monotonic()
+        while True:
+            if time.monotonic() >= next_refresh:
+                try:
+                    games = self.live_games_api.pull_games()
+                except (RuntimeError, ValueError) as e:
+                    logger.error(f"Error refreshing live games error {e}")
+                    games = None
+                if games is not None:
+                    unfinished = any(game.gameState not in FINAL_STATES for game in games)
+                    final = {game.id for game in games if game.gameState in FINAL_STATES}
+                    for game in games:
+                        if game.gameState in LIVE_STATES and game.id not in polling:
+                            logger.info(f"Polling live game {game.id}")
+                            polling.add(game.id)
+                            heapq.heappush(queue, (time.monotonic(), game.id))
+                next_refresh = time.monotonic() + refresh_interval
+            if not queue:
+                if not unfinished:
+                    break
+                time.sleep(max(0, next_refresh - time.monotonic()))
+                continue
+            due, game_id = heapq.heappop(queue)
+            if game_id in final:
+                logger.info(f"Game {game_id} is final on the scoreboard")
+                continue
+            time.sleep(max(0, min(due, next_refresh) - time.monotonic()))
+            if due > time.monotonic():
+                heapq.heappush(queue, (due, game_id))
+                continue
+            try:
+                wait = self.poll(game_id)
+            except (RuntimeError, ValueError) as e:
+                logger.error(f"Error polling game {game_id} error {e}")
+                wait = self.error_interval
+            if wait is None:
+                logger.info(f"Game {game_id} is final")
+                continue
+            heapq.heappush(queue, (time.monotonic() + wait, game_id))
+
+
+if __name__ == '__main__':
+    poller = LiveGamePoller(GameStoryAPI(), LiveGamesAPI())
+    poller.subscribe(print)
+    poller.run()
@@ -0,0 +1,136 @@
+from __future__ import annotations
+from typing import List, Optional, Union
+
+from pydantic import BaseModel, ConfigDict, Field, TypeAdapter
+
+
+class APIModel(BaseModel):
+    """
+    Base for api responses. Validators are compiled once when the class is
+    created, unknown keys are kept for consumers that need them.
+    """
+    model_config = ConfigDict(extra='allow')
+
+
+class LocalizedName(APIModel):
+    default: str
+
+
+class Team(APIModel):
+    id: int
+    franchiseId: Optional[int] = None
+    fullName: str
+    leagueId: Optional[int] = None
+    rawTricode: Optional[str] = None
+    triCode: str
+
+
+class TeamsResponse(APIModel):
+    data: List[Team]
+    total: Optional[int] = None
+
+
+class Player(APIModel):
+    id: int
+    firstName: LocalizedName
+    lastName: LocalizedName
+    sweaterNumber: Optional[int] = None
+    positionCode: Optional[str] = None
+
+
+class Roster(APIModel):
+    forwards: List[Player]
+    defensemen: List[Player]
+    goalies: List[Player]
+
+
+class PeriodDescriptor(APIModel):
+    number: int
+    periodType: Optional[str] = None
+
+
+class Goal(APIModel):
+    playerId: Optional[int] = None
+    timeInPeriod: Optional[str] = None
+    teamAbbrev: Union[LocalizedName, str, None] = None
+    awayScore: Optional[int] = None
+    homeScore: Optional[int] = None
+
+
+class Penalty(APIModel):
+    timeInPeriod: Optional[str] = None
+    type: Optional[str] = None
+    duration: Optional[int] = None
+    descKey: Optional[str] = None
+    teamAbbrev: Union[LocalizedName, str, None] = None
+
+
+class PeriodScoring(APIModel):
+    periodDescriptor: PeriodDescriptor
+    goals: List[Goal] = []
+
+
+class PeriodPenalties(APIModel):
+    periodDescriptor: PeriodDescriptor
+    penalties: List[Penalty] = []
+
+
+class Summary(APIModel):
+    scoring: List[PeriodScoring] = []
+    penalties: List[PeriodPenalties] = []
+
+
+class Clock(APIModel):
+    timeRemaining: Optional[str] = None
+    running: Optional[bool] = None
+    inIntermission: bool = False
+
+
+class GameTeam(APIModel):
+    id: Optional[int] = None
+    abbrev: Optional[str] = None
+    score: Optional[int] = None
+
+
+class GameStory(APIModel):
+    id: int
+    season: Optional[int] = None
+    gameType: Optional[int] = None
+    gameState: Optional[str] = None
+    awayTeam: GameTeam = Field(default_factory=GameTeam)
+    homeTeam: GameTeam = Field(default_factory=GameTeam)
+    clock: Clock = Field(default_factory=Clock)
+    summary: Summary = Field(default_factory=Summary)
+
+
+class ScheduledGame(APIModel):
+    id: int
+    season: Optional[int] = None
+    gameType: Optional[int] = None
+    gameDate: Optional[str] = None
+    gameState: Optional[str] = None
+    awayTeam: GameTeam = Field(default_factory=GameTeam)
+    homeTeam: GameTeam = Field(default_factory=GameTeam)
+
+
+class Schedule(APIModel):
+    games: List[ScheduledGame]
+
+
+# Top level json arrays are validated in a single call
+SEASONS: TypeAdapter[List[int]] = TypeAdapter(List[int])
+
+
+def abbrev(team: Union[LocalizedName, str, None]) -> Optional[str]:
+    """
+    Team abbreviation from either a plain or localized value
+
+    Args:
+        team (Union[LocalizedName, str, None]): Team abbreviation
+
+    Returns:
+        Optional[str]: The abbreviation
+    """
+    if isinstance(team, LocalizedName):
+        return team.default
+    return team
@@ -37,16 +37,9 @@ class MongoConnect:
         return collection.insert_one(document).inserted_id
 
 
-client = MongoClient(host=self.config['mongodbhost'], port=int(self.config['mongodbport']))
+if __name__ == '__main__':
+    config = dotenv_values()
 
-db = client.get_database()
+    client = MongoConnect(config=config)
 
-collection: Collection = db.get_collection()
-
-collection.insert_one().inserted_id
-
-config = dotenv_values()
-
-client = MongoConnect(config=config)
-
-print(client.list_collections('admin'))
+    print(client.list_collections(client.database('admin')))
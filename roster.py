@@ -1,14 +1,14 @@
 from abc import ABC, abstractmethod
 from functools import lru_cache
-import json
 import logging
 from pathlib import Path
-from typing import Any, Dict, Optional
+from typing import Optional
 
 import requests
 import pandas as pd
 
 import globals
+from models import Roster
 
 logging.basicConfig(
     filename="./logs/rosters.log",
@@ -20,6 +20,10 @@ logging.basicConfig(
 
 class IRoster(ABC):
 
+    @abstractmethod
+    def get_current_roster_raw(self):
+        raise NotImplementedError()
+
     @abstractmethod
     def get_current_roster(self):
         raise NotImplementedError()
@@ -30,15 +34,10 @@ class RosterAPI(IRoster):
     def __init__(self, base_url: str = globals.BASEURL) -> None:
         self.base_url = base_url
 
-    def valid_data(self, response: Dict, key: str) -> None:
-        if key not in response:
-            logging.ERROR(f"Unable to pull roster for team, missing key {key}")
-            raise ValueError(f"Invalid response, missing key {key} in response")
-
     @lru_cache
-    def get_current_roster(self, team: str) -> Any:
+    def get_current_roster_raw(self, team: str) -> bytes:
         """
-        Get the current team roster
+        Get the current team roster as returned by the api
 
         Args:
             team (str): Team Id
@@ -47,7 +46,7 @@ class RosterAPI(IRoster):
             RuntimeError: Error is error pulling roster
 
         Returns:
-            Any: Results for the current roster
+            bytes: Response body for the current roster
         """
         url = self.base_url + 'v1/roster/' + team + '/current'
 
@@ -55,15 +54,32 @@ class RosterAPI(IRoster):
             logging.info(f"Pulling roster for team {team}")
             r = requests.get(url)
             r.raise_for_status()
-            data = r.json()
-            self.valid_data(data, 'forwards')
-            self.valid_data(data, 'goalies')
-            self.valid_data(data, 'defensemen')
-            logging.info(f"Data pulled for team {team}")
-            return data
         except requests.exceptions.RequestException as e:
             logging.error(f"Unable to pull roster for team {team} error: {e}")
             raise RuntimeError(f"Error pulling {team} team roster {e}")
+        logging.info(f"Data pulled for team {team}")
+        return r.content
+
+    @lru_cache
+    def get_current_roster(self, team: str) -> Roster:
+        """
+        Get the current team roster
+
+        Args:
+            team (str): Team Id
+
+        Raises:
+            RuntimeError: Error is error pulling roster
+            ValueError: Response does not match the roster model
+
+        Returns:
+            Roster: Results for the current roster
+        """
+        try:
+            return Roster.model_validate_json(self.get_current_roster_raw(team))
+        except ValueError as e:
+            logging.error(f"Invalid roster for team {team} error: {e}")
+            raise
 
 
 class RosterData:
@@ -76,9 +92,9 @@ class RosterData:
             roster (IRoster): Roster external data interface
         """
         self.roster_api: IRoster = roster
-        self._roster_data: Optional[Any] = None
+        self._roster_data: Optional[Roster] = None
 
-    def roster_data(self, team: str) -> Any:
+    def roster_data(self, team: str) -> Roster:
         """
         Set the roster data if None
 
@@ -86,7 +102,7 @@ class RosterData:
             team (str): Team to pull data for
 
         Returns:
-            Any: Roster data returned
+            Roster: Roster data returned
         """
         if self._roster_data is None:
             self._roster_data = self.roster_api.get_current_roster(team)
@@ -105,9 +121,9 @@ class RosterData:
         """
         try:
             logging.info(f"Pulling roster for team {team}")
-            data = self.roster_data(team)
+            data = self.roster_api.get_current_roster_raw(team)
             file_name.parent.mkdir(parents=True, exist_ok=True) #Ensure the path exists
-            file_name.write_text(json.dumps(data), encoding='utf-8')
+            file_name.write_bytes(data)
             logging.info(f"Wrote file for team {team}")
         except Exception as e:
             logging.error(f"Issue writing file for team {team} error {e}")
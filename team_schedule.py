@@ -1,9 +1,9 @@
-import json
-
 import requests
 
+from models import Schedule
+
 team = 'NYR'
 
 r = requests.get(f'https://api-web.nhle.com/v1/club-schedule/{team}/month/now')
 
-print(r.json())
+print(Schedule.model_validate_json(r.content))
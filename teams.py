@@ -4,12 +4,13 @@ from functools import lru_cache
 import json
 import logging
 from pathlib import Path
-from typing import Any, Dict, List, NamedTuple, Optional, Tuple
+from typing import List, NamedTuple, Optional, Tuple
 
 import pandas as pd
 import requests
 
 import globals
+from models import SEASONS, TeamsResponse
 
 logging.basicConfig(
     filename="./logs/teams.log",
@@ -24,14 +25,26 @@ class StartEndSeason(NamedTuple):
 
 class ITeams(ABC):
 
+    @abstractmethod
+    def pull_teams_raw(self):
+        raise NotImplementedError()
+
     @abstractmethod
     def pull_teams(self):
         raise NotImplementedError()
 
+    @abstractmethod
+    def pull_team_season_raw(self):
+        raise NotImplementedError()
+
     @abstractmethod
     def pull_team_season(self):
         raise NotImplementedError()
 
+    @abstractmethod
+    def pull_club_stats_raw(self):
+        raise NotImplementedError()
+
 class TeamsAPI(ITeams):
 
     def __init__(self,
@@ -44,25 +57,34 @@ class TeamsAPI(ITeams):
         """
         self.base_url = base_url
 
-    def valid_response(self, response: Dict, key: str) -> None:
+    @lru_cache
+    def pull_teams_raw(self,
+                       teams_url: str = 'https://api.nhle.com/',
+                       end_point: str = 'stats/rest/en/team') -> bytes:
         """
-        Assert key is in API response
+        Pull team data as returned by the api
 
         Args:
-            response (Dict): The API response
-            key (str): Key to ensure is in response
+            teams_url (str, optional): Url for teams data
+            end_point (str, optional): Endpoint for teams data
 
-        Raises:
-            RuntimeError: If error, raise the runtime error
+        Returns:
+            bytes: Response body
         """
-        if key not in response:
-            logging.error(f"Required key {key} missing in data")
-            raise ValueError("Key not in data returned")
+        url = teams_url + end_point
+        try:
+            logging.info(f"Fetching data from url: {url}")
+            r = requests.get(url)
+            r.raise_for_status()
+        except requests.exceptions.RequestException as e:
+            logging.error(f"Error fetching team data: {e}")
+            raise RuntimeError(f"Error fetching team data: {e}")
+        return r.content
 
     @lru_cache
     def pull_teams(self,
                    teams_url: str = 'https://api.nhle.com/',
-                   end_point: str = 'stats/rest/en/team') -> Any:
+                   end_point: str = 'stats/rest/en/team') -> TeamsResponse:
         """
         Pull team data
 
@@ -70,20 +92,41 @@ class TeamsAPI(ITeams):
             teams_url (str, optional): Url for teams data
             end_point (str, optional): Endpoint for teams data
 
+        Raises:
+            ValueError: Response does not match the teams model
+
         Returns:
-            Any: Teams from global api as JSON object
+            TeamsResponse: Teams from global api
         """
-        url = teams_url + end_point
         try:
-            logging.info(f"Fetching data from url: {url}")
+            return TeamsResponse.model_validate_json(self.pull_teams_raw(teams_url, end_point))
+        except ValueError as e:
+            logging.error(f"Invalid teams data: {e}")
+            raise
+
+    @lru_cache
+    def pull_team_season_raw(self,
+                             triCode: str,
+                             end_point: str = 'v1/roster-season/') -> bytes:
+        """
+        Returns the seasons that the franchise played as returned by the api
+
+        Args:
+            triCode (str): team code
+            end_point (str): api end point. Default v1/roster-season/
+
+        Returns:
+            bytes: Response body
+        """
+        url = self.base_url + end_point + triCode
+        try:
+            logging.info(f"Fetching from url: {url}")
             r = requests.get(url)
             r.raise_for_status()
-            data = r.json()
-            self.valid_response(data, 'data')
-            return data
         except requests.exceptions.RequestException as e:
             logging.error(f"Error fetching team data: {e}")
-            raise RuntimeError(f"Error fetching team data: {e}")
+            raise RuntimeError(f"Error fetching team {triCode} season: {e}")
+        return r.content
 
     @lru_cache
     def pull_team_season(self,
@@ -96,18 +139,46 @@ class TeamsAPI(ITeams):
             triCode (str): team code
             end_point (str): api end point. Default v1/roster-season/
 
+        Raises:
+            ValueError: Response is not a list of seasons
+
         Returns:
             List[int]: Seasons the team played
         """
-        url = self.base_url + end_point + triCode
+        try:
+            return SEASONS.validate_json(self.pull_team_season_raw(triCode, end_point))
+        except ValueError as e:
+            logging.error(f"Invalid season data for team {triCode}: {e}")
+            raise
+
+    def pull_club_stats_raw(self,
+                            triCode: str,
+                            season: int,
+                            game_type: int = 2,
+                            end_point: str = 'v1/club-stats/',
+                            timeout: float = 10) -> bytes:
+        """
+        Returns the team's skater and goalie stats for a season as returned by the api
+
+        Args:
+            triCode (str): team code
+            season (int): Season e.g. 20232024
+            game_type (int, optional): Game type, 2 regular season and 3 playoffs. Defaults to 2.
+            end_point (str): api end point. Default v1/club-stats/
+            timeout (float, optional): Seconds to wait for the api. Defaults to 10.
+
+        Returns:
+            bytes: Response body
+        """
+        url = self.base_url + end_point + triCode + '/' + str(season) + '/' + str(game_type)
         try:
             logging.info(f"Fetching from url: {url}")
-            r = requests.get(url)
+            r = requests.get(url, timeout=timeout)
             r.raise_for_status()
-            return r.json()
         except requests.exceptions.RequestException as e:
-            logging.error(f"Error fetching team data: {e}")
-            raise RuntimeError(f"Error fetching team {triCode} season: {e}")
+            logging.error(f"Error fetching club stats: {e}")
+            raise RuntimeError(f"Error fetching team {triCode} stats for {season}: {e}")
+        return r.content
 
 
 class TeamsData:
@@ -120,7 +191,7 @@ class TeamsData:
             teams (ITeams): Teams data interface
         """
         self.teams: ITeams = teams
-        self.teams_data: Optional[Any] = None
+        self.teams_data: Optional[TeamsResponse] = None
         self._df: Optional[pd.DataFrame] = None
 
     @property
@@ -153,7 +224,7 @@ class TeamsData:
             raise TypeError("df must be set to type pandas DataFrame")
         self._df = value
 
-    def pull_teams(self, refresh: bool = False) -> Any:
+    def pull_teams(self, refresh: bool = False) -> TeamsResponse:
         """
         Get the teams data if None or manual refresh
 
@@ -161,12 +232,21 @@ class TeamsData:
             refresh (bool, optional): Teams data from Teams object. Defaults to False.
 
         Returns:
-            Any: Teams data
+            TeamsResponse: Teams data
         """
         if self.teams_data is None or refresh:
             self.teams_data = self.teams.pull_teams()
         return self.teams_data
 
+    def pull_teams_raw(self) -> bytes:
+        """
+        Get the teams data as returned by the api
+
+        Returns:
+            bytes: Teams response body
+        """
+        return self.teams.pull_teams_raw()
+
     def pull_teams_df(self) -> pd.DataFrame:
         """
         Format teams into a pandas DataFrame
@@ -174,8 +254,8 @@ class TeamsData:
         Returns:
             pd.DataFrame: Pandas DataFrame with teams
         """
-        result: Any = self.pull_teams()
-        self.df = pd.DataFrame(result['data'])
+        result: TeamsResponse = self.pull_teams()
+        self.df = pd.DataFrame([team.model_dump() for team in result.data])
         return self.df
 
     @staticmethod
@@ -252,13 +332,13 @@ class WriteTeamsDataLocal(IWriteTeamsData):
         """
         try:
             logging.info("Writing teams data")
-            data = teams.pull_teams()
+            data = self.teams.pull_teams_raw()
             file_name.parent.mkdir(parents=True, exist_ok=True)
-            file_name.write_text(data, encoding='utf-8')
+            file_name.write_bytes(data)
             logging.info("Finished writing file")
         except Exception as e:
             logging.error("Error writing teams data")
-            raise RuntimeError("Error writing teams data {e}")
+            raise RuntimeError(f"Error writing teams data {e}")
 
     def to_csv(self,
                path: Path = Path('./data/teams.csv')) -> None:
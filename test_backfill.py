@@ -0,0 +1,294 @@
+from typing import Generator
+
+import pytest
+import requests
+
+from pymongo import ReturnDocument, UpdateOne
+
+from backfill import (BackfillWorker, DuckDBLeaseStore, MongoLeaseStore, WorkUnit, game_ids,
+                      plan_game_story_units, plan_team_season_units, team_seasons)
+from game_story import GameStoryAPI, GameStoryData, WriteGameStoryLocal
+
+class TestBackfill:
+
+    @pytest.fixture
+    def store(self, tmp_path) -> Generator:
+        yield DuckDBLeaseStore(tmp_path / 'leases.duckdb')
+
+    def test_plan_game_story_units(self):
+        units = plan_game_story_units(2023, 2024, game_types=(2,), chunk_size=500)
+
+        assert len(units) == 6
+        assert units[0].unit_id == 'game_story:2023:02:0001-0500'
+        assert units[2].payload['last'] == 1312
+
+    def test_game_ids(self):
+        unit = plan_game_story_units(2024, 2024, game_types=(2,), chunk_size=100)[5]
+
+        result = game_ids(unit.payload)
+
+        assert result[0] == 2024020501
+        assert result[-1] == 2024020600
+        assert 2024020586 in result
+
+    def test_plan_playoff_units(self):
+        units = plan_game_story_units(2023, 2023, game_types=(3,))
+
+        result = [game_id for unit in units for game_id in game_ids(unit.payload)]
+
+        assert len(result) == (8 + 4 + 2 + 1) * 7
+        assert len(set(result)) == len(result)
+        for game_id in result:
+            number = f"{game_id % 10_000:04d}"
+            assert game_id // 10_000 == 202303
+            assert number[0] == '0'
+            assert 1 <= int(number[1]) <= 4
+            assert 1 <= int(number[2]) <= 8
+            assert 1 <= int(number[3]) <= 7
+        assert 2023030421 not in result
+        assert 2023030411 in result
+
+    def test_plan_team_season_units(self):
+        units = plan_team_season_units({'NYR': [20242025, 20232024, 20242025], 'BUF': [20232024]})
+
+        assert [unit.unit_id for unit in units] == ['team_season:BUF:20232024',
+                                                    'team_season:NYR:20232024',
+                                                    'team_season:NYR:20242025']
+        assert units[2].payload == {'triCode': 'NYR', 'season': 20242025}
+
+    def test_team_seasons(self, mocker):
+        def pull_team_season(code):
+            if code != 'NYR':
+                raise RuntimeError("404")
+            return [20232024]
+
+        teams = mocker.MagicMock()
+        teams.pull_team_season.side_effect = pull_team_season
+
+        assert team_seasons(teams, ['NYR', 'QUE']) == {'NYR': [20232024]}
+
+    def test_claim_unique(self, store):
+        store.add_units(plan_team_season_units({'NYR': [20232024], 'BUF': [20232024]}))
+        store.add_units(plan_team_season_units({'NYR': [20232024]}))
+
+        first = store.claim('worker-1', lease_seconds=60)
+        second = store.claim('worker-2', lease_seconds=60)
+
+        assert first.unit_id != second.unit_id
+        assert store.claim('worker-3', lease_seconds=60) is None
+        assert store.counts() == {'leased': 2}
+
+    def test_expired_lease_reclaimed(self, store):
+        store.add_units(plan_team_season_units({'NYR': [20232024]}))
+
+        unit = store.claim('worker-1', lease_seconds=-1)
+        reclaimed = store.claim('worker-2', lease_seconds=60)
+
+        assert reclaimed == unit
+        assert not store.heartbeat(unit.unit_id, 'worker-1', 60)
+        assert not store.complete(unit.unit_id, 'worker-1')
+        assert store.complete(unit.unit_id, 'worker-2')
+        assert store.counts() == {'done': 1}
+
+    def test_max_attempts(self, store):
+        store.add_units(plan_team_season_units({'NYR': [20232024]}))
+
+        unit = store.claim('worker-1', lease_seconds=60, max_attempts=2)
+        store.release(unit.unit_id, 'worker-1', max_attempts=2)
+        assert store.counts() == {'pending': 1}
+
+        unit = store.claim('worker-1', lease_seconds=60, max_attempts=2)
+        store.release(unit.unit_id, 'worker-1', max_attempts=2)
+
+        assert store.claim('worker-1', lease_seconds=60, max_attempts=2) is None
+        assert store.counts() == {'failed': 1}
+
+    def test_max_attempts_expired_lease(self, store):
+        store.add_units(plan_team_season_units({'NYR': [20232024], 'BUF': [20232024]}))
+
+        store.claim('worker-1', lease_seconds=-1, max_attempts=1)
+        store.claim('worker-2', lease_seconds=60, max_attempts=1)
+
+        assert store.claim('worker-3', lease_seconds=60, max_attempts=1) is None
+        assert store.counts() == {'failed': 1, 'leased': 1}
+
+    def test_worker_run(self, store, tmp_path, mocker):
+        store.add_units(plan_team_season_units({'NYR': [20232024], 'BUF': [20232024]}))
+        store.add_units([WorkUnit('game_story:2024:02:0586-0587', 'game_story',
+                                  {'season': 2024, 'game_type': 2, 'first': 586, 'last': 587})])
+        writer = mocker.MagicMock()
+        teams = mocker.MagicMock()
+        teams.pull_club_stats_raw.return_value = b'{"skaters":[],"goalies":[]}'
+
+        worker = BackfillWorker(store, writer, teams, path=str(tmp_path) + '/')
+        result = worker.run()
+
+        assert result == 3
+        assert store.counts() == {'done': 3}
+        assert writer.raw_data.call_count == 2
+        teams.pull_club_stats_raw.assert_any_call('NYR', 20232024)
+        assert (tmp_path / 'club_stats_NYR_20232024.json').read_bytes() == b'{"skaters":[],"goalies":[]}'
+
+    def test_worker_heartbeat_throttled(self, store, tmp_path, mocker):
+        now = [0.0]
+
+        def write_game(game_id, path):
+            now[0] += 1
+
+        mocker.patch('backfill.time.monotonic', side_effect=lambda: now[0])
+        heartbeat = mocker.spy(store, 'heartbeat')
+        store.add_units([WorkUnit('game_story:2024:02:0001-0100', 'game_story',
+                                  {'season': 2024, 'game_type': 2, 'first': 1, 'last': 100})])
+        writer = mocker.MagicMock()
+        writer.raw_data.side_effect = write_game
+
+        worker = BackfillWorker(store, writer, mocker.MagicMock(), lease_seconds=60, path=str(tmp_path) + '/')
+
+        assert worker.run() == 1
+        assert writer.raw_data.call_count == 100
+        assert heartbeat.call_count == 3
+
+    def test_worker_retries_store_error(self, store, tmp_path, mocker):
+        sleep = mocker.patch('backfill.time.sleep')
+        store.add_units(plan_team_season_units({'NYR': [20232024]}))
+        claim = store.claim
+        mocker.patch.object(store, 'claim', side_effect=[RuntimeError("Unable to open lease store"),
+                                                          claim('worker-1', 60), None])
+        teams = mocker.MagicMock()
+        teams.pull_club_stats_raw.return_value = b'{}'
+
+        worker = BackfillWorker(store, mocker.MagicMock(), teams, worker_id='worker-1',
+                                store_retry_wait=2, path=str(tmp_path) + '/')
+
+        assert worker.run() == 1
+        assert store.counts() == {'done': 1}
+        sleep.assert_called_once_with(2)
+
+    def http_error(self, mocker, status_code):
+        mock_response = mocker.MagicMock()
+        mock_response.status_code = status_code
+        mock_response.raise_for_status.side_effect = requests.exceptions.HTTPError(response=mock_response)
+        return mocker.patch('requests.get', return_value=mock_response)
+
+    def test_worker_skips_missing_games(self, store, tmp_path, mocker):
+        self.http_error(mocker, 404)
+        store.add_units([WorkUnit('game_story:2024:02:0586-0587', 'game_story',
+                                  {'season': 2024, 'game_type': 2, 'first': 586, 'last': 587})])
+        writer = WriteGameStoryLocal(GameStoryData(GameStoryAPI()))
+
+        worker = BackfillWorker(store, writer, mocker.MagicMock(), path=str(tmp_path) + '/')
+
+        assert worker.run() == 1
+        assert store.counts() == {'done': 1}
+
+    def test_worker_retries_server_error(self, store, tmp_path, mocker):
+        get = self.http_error(mocker, 503)
+        store.add_units([WorkUnit('game_story:2024:02:0586-0587', 'game_story',
+                                  {'season': 2024, 'game_type': 2, 'first': 586, 'last': 587})])
+        writer = WriteGameStoryLocal(GameStoryData(GameStoryAPI()))
+
+        worker = BackfillWorker(store, writer, mocker.MagicMock(), max_attempts=1, path=str(tmp_path) + '/')
+
+        assert worker.run() == 0
+        assert store.counts() == {'failed': 1}
+        assert get.call_count == 1
+        assert get.call_args.kwargs['timeout'] == 10
+        assert list(tmp_path.glob('*.json')) == []
+
+    def test_worker_retries_timeout(self, store, tmp_path, mocker):
+        mocker.patch('requests.get', side_effect=requests.exceptions.Timeout("timed out"))
+        store.add_units([WorkUnit('game_story:2024:02:0586-0586', 'game_story',
+                                  {'season': 2024, 'game_type': 2, 'first': 586, 'last': 586})])
+        writer = WriteGameStoryLocal(GameStoryData(GameStoryAPI()))
+
+        worker = BackfillWorker(store, writer, mocker.MagicMock(), max_attempts=2, path=str(tmp_path) + '/')
+
+        assert worker.run() == 0
+        assert store.counts() == {'failed': 1}
+
+
+class TestMongoLeaseStore:
+
+    @pytest.fixture
+    def collection(self, mocker) -> Generator:
+        client = mocker.MagicMock()
+        mocker.patch('backfill.time.time', return_value=1000.0)
+        yield client.database.return_value.__getitem__.return_value, MongoLeaseStore(client)
+
+    def test_add_units(self, collection):
+        collection, store = collection
+
+        store.add_units(plan_team_season_units({'NYR': [20232024]}))
+
+        operations = collection.bulk_write.call_args.args[0]
+        assert operations == [UpdateOne({'_id': 'team_season:NYR:20232024'},
+                                        {'$setOnInsert': {'kind': 'team_season',
+                                                          'payload': {'triCode': 'NYR', 'season': 20232024},
+                                                          'status': 'pending',
+                                                          'owner': None,
+                                                          'lease_expires': None,
+                                                          'attempts': 0}},
+                                        upsert=True)]
+        assert collection.bulk_write.call_args.kwargs == {'ordered': False}
+
+    def test_claim(self, collection):
+        collection, store = collection
+        collection.find_one_and_update.return_value = {'_id': 'team_season:NYR',
+                                                       'kind': 'team_season',
+                                                       'payload': {'triCode': 'NYR'}}
+
+        result = store.claim('worker-1', lease_seconds=60, max_attempts=3)
+
+        assert result == WorkUnit('team_season:NYR', 'team_season', {'triCode': 'NYR'})
+        expired_or_pending = [{'status': 'pending'},
+                              {'status': 'leased', 'lease_expires': {'$lt': 1000.0}}]
+        collection.update_many.assert_called_once_with(
+            {'attempts': {'$gte': 3}, '$or': expired_or_pending},
+            {'$set': {'status': 'failed', 'owner': None, 'lease_expires': None}})
+        collection.find_one_and_update.assert_called_once_with(
+            {'attempts': {'$lt': 3}, '$or': expired_or_pending},
+            {'$set': {'status': 'leased', 'owner': 'worker-1', 'lease_expires': 1060.0},
+             '$inc': {'attempts': 1}},
+            sort=[('_id', 1)],
+            return_document=ReturnDocument.AFTER)
+
+    def test_claim_no_work(self, collection):
+        collection, store = collection
+        collection.find_one_and_update.return_value = None
+
+        assert store.claim('worker-1', lease_seconds=60) is None
+
+    def test_heartbeat_and_complete(self, collection):
+        collection, store = collection
+        collection.update_one.return_value.matched_count = 1
+
+        assert store.heartbeat('team_season:NYR', 'worker-1', 60)
+        assert collection.update_one.call_args.args == (
+            {'_id': 'team_season:NYR', 'owner': 'worker-1', 'status': 'leased'},
+            {'$set': {'lease_expires': 1060.0}})
+
+        assert store.complete('team_season:NYR', 'worker-1')
+        assert collection.update_one.call_args.args == (
+            {'_id': 'team_season:NYR', 'owner': 'worker-1', 'status': 'leased'},
+            {'$set': {'status': 'done', 'lease_expires': None}})
+
+        collection.update_one.return_value.matched_count = 0
+        assert not store.heartbeat('team_season:NYR', 'worker-1', 60)
+
+    def test_release(self, collection):
+        collection, store = collection
+
+        store.release('team_season:NYR', 'worker-1', max_attempts=2)
+
+        collection.update_one.assert_called_once_with(
+            {'_id': 'team_season:NYR', 'owner': 'worker-1', 'status': 'leased'},
+            [{'$set': {'status': {'$cond': [{'$gte': ['$attempts', 2]}, 'failed', 'pending']},
+                       'owner': None,
+                       'lease_expires': None}}])
+
+    def test_counts(self, collection):
+        collection, store = collection
+        collection.aggregate.return_value = [{'_id': 'done', 'count': 2}, {'_id': 'failed', 'count': 1}]
+
+        assert store.counts() == {'done': 2, 'failed': 1}
+        assert collection.aggregate.call_args.args[0] == [{'$group': {'_id': '$status', 'count': {'$sum': 1}}}]
@@ -0,0 +1,170 @@
+import json
+from typing import Generator
+
+import pytest
+import requests
+
+from game_story import ConditionalResponse, GameStoryAPI
+from live_games import LiveGamePoller, LiveGamesAPI, diff_snapshots
+from models import GameStory, ScheduledGame
+
+def game_story(state='LIVE', goals=(), intermission=False):
+    return GameStory.model_validate({
+        'id': 2024020586,
+        'gameState': state,
+        'clock': {'inIntermission': intermission},
+        'awayTeam': {'score': len(goals)},
+        'homeTeam': {'score': 0},
+        'summary': {
+            'scoring': [{'periodDescriptor': {'number': 1},
+                         'goals': [{'playerId': player, 'timeInPeriod': clock} for player, clock in goals]}],
+            'penalties': [],
+        },
+    })
+
+def scheduled(game_id, state):
+    return ScheduledGame(id=game_id, gameState=state)
+
+class TestLiveGames:
+
+    @pytest.fixture
+    def poller(self, mocker) -> Generator:
+        yield LiveGamePoller(mocker.MagicMock(spec=GameStoryAPI), mocker.MagicMock(spec=LiveGamesAPI))
+
+    @pytest.fixture
+    def clock(self, mocker) -> Generator:
+        now = [0.0]
+
+        def sleep(seconds):
+            now[0] += seconds
+
+        sleep_mock = mocker.patch('live_games.time.sleep', side_effect=sleep)
+        mocker.patch('live_games.time.monotonic', side_effect=lambda: now[0])
+        yield sleep_mock
+
+    def test_pull_live_games(self, mocker):
+        mock_data = {"games": [{"id": 2024020586, "gameState": "LIVE"},
+                               {"id": 2024020587, "gameState": "FUT"},
+                               {"id": 2024020588, "gameState": "CRIT"}]}
+
+        mock_response = mocker.MagicMock()
+        mock_response.content = json.dumps(mock_data).encode()
+
+        mocker.patch('requests.get', return_value=mock_response)
+
+        assert LiveGamesAPI().pull_live_games() == [2024020586, 2024020588]
+
+    def test_pull_conditional_not_modified(self, mocker):
+        mock_response = mocker.MagicMock()
+        mock_response.status_code = 304
+
+        get = mocker.patch('requests.get', return_value=mock_response)
+
+        result = GameStoryAPI().pull_conditional(2024020586, etag='"abc"')
+
+        assert result == ConditionalResponse(None, '"abc"', None)
+        assert get.call_args.kwargs['headers'] == {'If-None-Match': '"abc"'}
+        assert get.call_args.kwargs['timeout'] == 3
+
+    def test_pull_conditional_timeout(self, mocker):
+        mocker.patch('requests.get', side_effect=requests.exceptions.Timeout("timed out"))
+
+        with pytest.raises(RuntimeError):
+            GameStoryAPI().pull_conditional(2024020586)
+
+    def test_diff_new_goal(self):
+        previous = game_story(goals=[(8478550, '05:12')])
+        current = game_story(goals=[(8478550, '05:12'), (8480078, '11:40')])
+
+        events = diff_snapshots(2024020586, previous, current)
+
+        assert [event.kind for event in events] == ['goal', 'score']
+        assert events[0].data.playerId == 8480078
+        assert events[1].data == {'away': 2, 'home': 0}
+
+    def test_diff_unchanged(self):
+        snapshot = game_story(goals=[(8478550, '05:12')])
+
+        assert diff_snapshots(2024020586, snapshot, snapshot) == []
+
+    def test_interval(self, poller):
+        assert poller.interval(game_story()) == poller.live_interval
+        assert poller.interval(game_story(intermission=True)) == poller.intermission_interval
+        assert poller.interval(game_story(state='FINAL')) is None
+
+    def test_poll_publishes_only_new_events(self, poller):
+        received = []
+        poller.subscribe(received.append)
+        poller.game_story_api.pull_conditional.side_effect = [
+            ConditionalResponse(game_story(goals=[(8478550, '05:12')]), '"1"', None),
+            ConditionalResponse(None, '"1"', None),
+            ConditionalResponse(game_story(state='FINAL', goals=[(8478550, '05:12')]), '"2"', None),
+        ]
+
+        assert poller.poll(2024020586) == poller.live_interval
+        assert poller.poll(2024020586) == poller.live_interval
+        assert poller.poll(2024020586) is None
+
+        assert [event.kind for event in received] == ['goal', 'score', 'state', 'state']
+        assert poller.game_story_api.pull_conditional.call_args.args == (2024020586, '"1"', None)
+
+    def test_run_stops_at_final(self, poller, clock):
+        poller.live_games_api.pull_games.side_effect = [
+            [scheduled(2024020586, 'LIVE')],
+            [scheduled(2024020586, 'FINAL')],
+        ]
+        poller.game_story_api.pull_conditional.side_effect = [
+            ConditionalResponse(game_story(), None, None),
+            ConditionalResponse(game_story(state='FINAL'), None, None),
+        ]
+
+        poller.run()
+
+        assert poller.game_story_api.pull_conditional.call_count == 2
+        assert poller.live_games_api.pull_games.call_count == 2
+
+    def test_run_waits_for_later_games(self, poller, clock):
+        poller.live_games_api.pull_games.side_effect = [
+            [scheduled(2024020585, 'FINAL'), scheduled(2024020586, 'FUT')],
+            [scheduled(2024020585, 'FINAL'), scheduled(2024020586, 'LIVE')],
+            [scheduled(2024020585, 'OFF'), scheduled(2024020586, 'FINAL')],
+        ]
+        poller.game_story_api.pull_conditional.side_effect = [
+            ConditionalResponse(game_story(), None, None),
+            ConditionalResponse(game_story(state='FINAL'), None, None),
+        ]
+
+        poller.run(refresh_interval=300)
+
+        assert poller.live_games_api.pull_games.call_count == 3
+        assert poller.game_story_api.pull_conditional.call_count == 2
+        assert poller.game_story_api.pull_conditional.call_args.args[0] == 2024020586
+        clock.assert_any_call(300)
+
+    def test_run_survives_refresh_error(self, poller, clock):
+        poller.live_games_api.pull_games.side_effect = [
+            RuntimeError("503"),
+            [scheduled(2024020586, 'LIVE')],
+            [scheduled(2024020586, 'FINAL')],
+        ]
+        poller.game_story_api.pull_conditional.side_effect = [
+            ConditionalResponse(game_story(), None, None),
+            ConditionalResponse(game_story(state='FINAL'), None, None),
+        ]
+
+        poller.run(refresh_interval=300)
+
+        assert poller.live_games_api.pull_games.call_count == 3
+        assert poller.game_story_api.pull_conditional.call_count == 2
+
+    def test_run_drops_failing_game_when_final(self, poller, clock):
+        poller.live_games_api.pull_games.side_effect = [
+            [scheduled(2024020586, 'LIVE')],
+            [scheduled(2024020586, 'FINAL')],
+        ]
+        poller.game_story_api.pull_conditional.side_effect = RuntimeError("404")
+
+        poller.run(refresh_interval=300)
+
+        assert poller.live_games_api.pull_games.call_count == 2
+        assert poller.game_story_api.pull_conditional.call_count == 21
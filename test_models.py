@@ -0,0 +1,96 @@
+import json
+from typing import Generator
+
+import pytest
+
+from models import SEASONS, GameStory, Roster, abbrev
+from game_story import GameStoryAPI, GameStoryData, WriteGameStoryLocal
+from roster import RosterAPI, RosterData
+
+class TestModels:
+
+    @pytest.fixture
+    def roster_api(self) -> Generator:
+        yield RosterAPI()
+
+    def player(self, player_id, first, last):
+        return {"id": player_id, "firstName": {"default": first}, "lastName": {"default": last},
+                "sweaterNumber": 10, "positionCode": "C", "shootsCatches": "L"}
+
+    def test_roster(self, roster_api, mocker):
+        mock_data = {"forwards": [self.player(8478550, "Artemi", "Panarin")],
+                     "defensemen": [self.player(8476885, "Jacob", "Trouba")],
+                     "goalies": [self.player(8478048, "Igor", "Shesterkin")]}
+
+        mock_response = mocker.MagicMock()
+        mock_response.content = json.dumps(mock_data).encode()
+
+        mocker.patch('requests.get', return_value=mock_response)
+
+        result = roster_api.get_current_roster('NYR')
+
+        assert isinstance(result, Roster)
+        assert result.forwards[0].lastName.default == 'Panarin'
+        assert result.model_dump(exclude_unset=True) == mock_data
+
+    def test_roster_missing_key(self, roster_api, mocker):
+        mock_data = {"forwards": [], "defensemen": []}
+
+        mock_response = mocker.MagicMock()
+        mock_response.content = json.dumps(mock_data).encode()
+
+        mocker.patch('requests.get', return_value=mock_response)
+
+        with pytest.raises(ValueError):
+            roster_api.get_current_roster('BUF')
+
+    def test_seasons(self):
+        assert SEASONS.validate_json(b'[19261927, 19271928]') == [19261927, 19271928]
+
+        with pytest.raises(ValueError):
+            SEASONS.validate_json(b'{"seasons": []}')
+
+    def test_game_story_defaults(self):
+        result = GameStory.model_validate_json(b'{"id": 2024020586, "gameState": "FUT"}')
+
+        assert result.summary.scoring == []
+        assert result.clock.inIntermission is False
+        assert result.homeTeam.score is None
+
+    def test_abbrev(self):
+        result = GameStory.model_validate_json(json.dumps({
+            "id": 2024020586,
+            "summary": {"penalties": [{"periodDescriptor": {"number": 2},
+                                       "penalties": [{"teamAbbrev": {"default": "NYR"}},
+                                                     {"teamAbbrev": "BUF"}]}]},
+        }))
+
+        penalties = result.summary.penalties[0].penalties
+        assert [abbrev(penalty.teamAbbrev) for penalty in penalties] == ['NYR', 'BUF']
+
+    def test_game_story_raw_bytes(self, tmp_path, mocker):
+        content = b'{"homeTeam": {"score": "2"}, "id": 2024020586, "gameState": "LIVE"}'
+
+        mock_response = mocker.MagicMock()
+        mock_response.content = content
+
+        mocker.patch('requests.get', return_value=mock_response)
+
+        api = GameStoryAPI()
+        WriteGameStoryLocal(GameStoryData(api)).raw_data(game_id=2024020586, path=str(tmp_path) + '/')
+
+        assert (tmp_path / 'game_story_2024020586.json').read_bytes() == content
+        assert api.pull_data(2024020586).homeTeam.score == 2
+
+    def test_roster_raw_bytes_invalid_model(self, roster_api, tmp_path, mocker):
+        content = b'{"forwards": [], "defensemen": []}'
+
+        mock_response = mocker.MagicMock()
+        mock_response.content = content
+
+        mocker.patch('requests.get', return_value=mock_response)
+
+        file_name = tmp_path / 'roster.json'
+        RosterData(roster_api).raw_data('BUF', file_name)
+
+        assert file_name.read_bytes() == content
@@ -1,3 +1,4 @@
+import json
 from typing import Generator
 
 import pytest
@@ -31,15 +32,16 @@ class TestTeams:
         }
 
         mock_response = mocker.MagicMock()
-        mock_response.json.return_value = mock_data
+        mock_response.content = json.dumps(mock_data).encode()
 
         # Patch the 'requests.get' to return the value that we want
         mocker.patch('requests.get', return_value=mock_response)
 
         result = teams_api.pull_teams()
 
-        assert result == mock_data
-        assert len(result['data']) == 4
+        assert result.model_dump(exclude_unset=True) == mock_data
+        assert len(result.data) == 4
+        assert result.data[1].triCode == 'MTL'
 
     def test_pull_teams_missing_data_key(self, teams_api, mocker):
 
@@ -52,7 +54,7 @@ class TestTeams:
         }
 
         mock_response = mocker.MagicMock()
-        mock_response.json.return_value = mock_data
+        mock_response.content = json.dumps(mock_data).encode()
 
         mocker.patch('requests.get', return_value=mock_response)
 
@@ -64,10 +66,22 @@ class TestTeams:
         mock_data = [19261927, 19271928, 19281929, 19291930, 19301931, 19311932, 19321933,]
 
         mock_response = mocker.MagicMock()
-        mock_response.json.return_value = mock_data
+        mock_response.content = json.dumps(mock_data).encode()
 
         mocker.patch('requests.get', return_value=mock_response)
 
         result = teams_api.pull_team_season('NYR')
 
         assert result == mock_data
+
+    def test_pull_club_stats_raw(self, teams_api, mocker):
+
+        mock_response = mocker.MagicMock()
+        mock_response.content = b'{"skaters":[],"goalies":[]}'
+
+        get = mocker.patch('requests.get', return_value=mock_response)
+
+        result = teams_api.pull_club_stats_raw('NYR', 20232024)
+
+        assert result == b'{"skaters":[],"goalies":[]}'
+        assert get.call_args.args[0] == 'https://api-web.nhle.com/v1/club-stats/NYR/20232024/2'